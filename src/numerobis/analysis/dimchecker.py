@@ -2,7 +2,8 @@
 
 import re
 from dataclasses import replace
-from typing import Literal, Optional
+from functools import cache
+from typing import Callable, Literal, Optional
 
 from numerobis.nodes.unit import VarDim
 
@@ -23,7 +24,7 @@ from ..nodes.unit import (
     UnitNode,
 )
 from ..typechecker.operators import typetable
-from ..utils import camel2snake_pattern
+from ..utils import visitor_name
 from .simplifier import Simplifier
 
 modes = Literal["dimension", "unit"]
@@ -126,9 +127,9 @@ class Dimchecker:
         self.env.dimensionized[node.name.name] = dimension
 
     def dimensionize(self, node: UnitNode, mode: modes = "dimension") -> UnitNode:
-        name = camel2snake_pattern.sub("_", type(node).__name__).lower() + "_"
-        if hasattr(self, name):
-            return getattr(self, name)(node, mode=mode)
+        visitor = _visitor(type(node))
+        if visitor is not None:
+            return visitor(self, node, mode=mode)
         else:
             raise NotImplementedError(
                 f"Unit type {type(node).__name__} not implemented"
@@ -150,8 +151,9 @@ class Dimchecker:
             return One()
 
         _mode = "dimensions" if mode == "dimension" else "dimensionized"
+        namespace = self.env(_mode)
 
-        if node.name not in self.env(_mode):
+        if node.name not in namespace:
             suggestion = self.env.suggest(_mode, node.name)
 
             self.errors.throw(
@@ -162,7 +164,8 @@ class Dimchecker:
                 loc=node.loc,
             )
 
-        resolved = self.env(_mode)[node.name]
+        # definitions are stored already resolved, so a single lookup suffices
+        resolved = namespace[node.name]
         resolved = resolved.value if isinstance(resolved, Expression) else resolved
         return replace(resolved, loc=node.loc)
 
@@ -190,12 +193,13 @@ class Dimchecker:
 
     def product_(self, node: Product, mode: modes = "dimension") -> Product:
         values = []
-        for i, factor in enumerate(node.values):
-            value = self.dimensionize(factor, mode=mode)
+        append, extend, dimensionize = values.append, values.extend, self.dimensionize
+        for factor in node.values:
+            value = dimensionize(factor, mode=mode)
             if isinstance(value, Product):
-                values.extend(value.values)
+                extend(value.values)
             else:
-                values.append(value)
+                append(value)
         return Product(values=values)
 
     def scalar_(self, node: Scalar, mode: modes = "dimension"):
@@ -205,13 +209,20 @@ class Dimchecker:
 
     def sum_(self, node: Sum, mode: modes = "dimension") -> Sum:
         values = []
-        for i, addend in enumerate(node.values):
-            value = self.dimensionize(addend, mode=mode)
+        append, extend, dimensionize = values.append, values.extend, self.dimensionize
+        for addend in node.values:
+            value = dimensionize(addend, mode=mode)
             if isinstance(value, Product):
-                values.extend(value.values)
+                extend(value.values)
             else:
-                values.append(value)
+                append(value)
         return Sum(values=values)
 
     def var_dim_(self, node: VarDim, mode: modes = "dimension") -> VarDim:
         return node
+
+
+@cache
+def _visitor(node_type: type) -> Optional[Callable]:
+    """Dimchecker method for a unit node type, resolved once per type."""
+    return getattr(Dimchecker, visitor_name(node_type), None)
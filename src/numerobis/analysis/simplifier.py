@@ -3,7 +3,8 @@
 from collections import defaultdict
 from dataclasses import replace
 from decimal import Decimal
-from typing import Type
+from functools import cache
+from typing import Callable, Optional, Type
 
 from ..classes import ModuleMeta
 from ..exceptions.exceptions import Exceptions
@@ -19,7 +20,7 @@ from ..nodes.unit import (
     Sum,
     UnitNode,
 )
-from ..utils import camel2snake_pattern
+from ..utils import visitor_name
 
 
 def cancel(node: UnitNode | One) -> UnitNode | One:
@@ -68,11 +69,10 @@ class Simplifier:
 
     def _simplify(self, node: UnitNode):
         """Dispatch to type-specific simplify handler if available."""
-        method_name = f"{camel2snake_pattern.sub('_', type(node).__name__).lower()}_"
-        handler = getattr(self, method_name, None)
+        handler = _handler(type(node))
 
         if handler:
-            return handler(node)
+            return handler(self, node)
         return node
 
     def _flatten(self, values: list[UnitNode], op_type: Type[Product | Sum]):
@@ -189,7 +189,13 @@ class Simplifier:
             new_values.append(Scalar(scalar_acc))
 
         for base, exps in groups.items():
-            total_exp = self.sum_(Sum(exps)) if len(exps) > 1 else exps[0]
+            if len(exps) == 1:
+                total_exp = exps[0]
+            elif all(type(e) is Scalar and e.unit is None for e in exps):
+                # plain numeric exponents add up directly, e.g. m * m^2 -> m^3
+                total_exp = Scalar(sum(e.value for e in exps))
+            else:
+                total_exp = self.sum_(Sum(exps))
 
             # Check for x^1 or x^0
             if isinstance(total_exp, Scalar):
@@ -252,3 +258,9 @@ class Simplifier:
                     new_values.append(Product([Scalar(Decimal(total_coeff)), base]))
 
         return self._finalize(new_values, Sum, Decimal(0))
+
+
+@cache
+def _handler(node_type: type) -> Optional[Callable]:
+    """Simplifier method for a unit node type, resolved once per type."""
+    return getattr(Simplifier, visitor_name(node_type), None)
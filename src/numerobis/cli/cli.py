@@ -84,8 +84,8 @@ def cli() -> None:
 @click.option(
     "--ccache/--no-ccache",
     "use_ccache",
-    default=False,
-    help="Use ccache to speed up recompilation.",
+    default=None,
+    help="Use ccache to speed up recompilation. Enabled for CMake builds when ccache is installed.",
 )
 def build(
     source: str,
@@ -97,7 +97,7 @@ def build(
     cc: str,
     linker: Optional[str],
     use_cmake: bool,
-    use_ccache: bool,
+    use_ccache: Optional[bool],
 ) -> None:
     """
     Compile SOURCE (.nbis) into a native executable.
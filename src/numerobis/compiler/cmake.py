@@ -1,8 +1,10 @@
 """CMake compiler integration for generating native executables from C code."""
 
+import atexit
 import shutil
 import subprocess
 import tempfile
+import threading
 from importlib import resources
 from pathlib import Path
 from typing import Optional
@@ -119,6 +121,59 @@ def _prepare_source_c(
     return source
 
 
+# configured build trees, reused across builds in the same process; the table
+# lock only guards lookups, each tree has its own lock held for a whole build
+_BUILD_DIRS: dict[
+    tuple[str, tuple[str, ...]], tuple[tempfile.TemporaryDirectory, threading.Lock]
+] = {}
+_BUILD_DIRS_LOCK = threading.Lock()
+
+# generated sources and the translation units that have to be recompiled
+# when they change
+_OBJECTS = {
+    "units.h": ("main.c", "source.c"),
+    "source.c": ("source.c",),
+    "main.c": ("main.c",),
+}
+
+
+@atexit.register
+def _cleanup_build_dirs():
+    with _BUILD_DIRS_LOCK:
+        for temp_dir, _ in _BUILD_DIRS.values():
+            temp_dir.cleanup()
+        _BUILD_DIRS.clear()
+
+
+def _build_dir(key: tuple[str, tuple[str, ...]]):
+    with _BUILD_DIRS_LOCK:
+        entry = _BUILD_DIRS.get(key)
+        if entry is None:
+            entry = _BUILD_DIRS[key] = (tempfile.TemporaryDirectory(), threading.Lock())
+        return entry
+
+
+def _write_if_changed(path: Path, text: str) -> bool:
+    """Rewrite a source only when it changed, reporting whether it did"""
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+def _invalidate(temp_path: Path, changed: set[str], binary: Path):
+    """Drop the objects built from changed sources, so they are rebuilt
+    regardless of how the file timestamps compare"""
+    if not changed:
+        return
+    object_dir = temp_path / "build" / "CMakeFiles" / "numerobis_bin.dir"
+    for name in changed:
+        for source in _OBJECTS[name]:
+            for obj in object_dir.glob(f"{source}.o*"):  # .o or .obj
+                obj.unlink()
+    binary.unlink(missing_ok=True)
+
+
 def _run_subprocess(cmd: list[str], cwd: Path):
     proc = subprocess.run(
         cmd,
@@ -171,37 +226,30 @@ def compile(
             "set(THREADS_PREFER_PTHREAD_FLAG ON)\nfind_package(Threads REQUIRED)"
         )
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            (temp_path / "units.h").write_text(units_h, encoding="utf-8")
-            (temp_path / "source.c").write_text(source_c, encoding="utf-8")
-            (temp_path / "main.c").write_text(main_c, encoding="utf-8")
-
-            if use_graphics:
-                graphics_pkgconfig = """\
+        if use_graphics:
+            graphics_pkgconfig = """\
 pkg_check_modules(SDL2     REQUIRED sdl2)
 pkg_check_modules(SDL2_TTF REQUIRED SDL2_ttf)
 """
-                graphics_include_dirs = """\
+            graphics_include_dirs = """\
     ${SDL2_INCLUDE_DIRS}
     ${SDL2_TTF_INCLUDE_DIRS}"""
-                graphics_link_dirs = """\
+            graphics_link_dirs = """\
     ${SDL2_LIBRARY_DIRS}
     ${SDL2_TTF_LIBRARY_DIRS}"""
-                graphics_libs = f"""\
+            graphics_libs = f"""\
     "-Wl,--whole-archive"
     "{graphics_lib.as_posix()}"
     "-Wl,--no-whole-archive"
     ${{SDL2_LIBRARIES}}
     ${{SDL2_TTF_LIBRARIES}}"""
-            else:
-                graphics_pkgconfig = ""
-                graphics_include_dirs = ""
-                graphics_link_dirs = ""
-                graphics_libs = ""
+        else:
+            graphics_pkgconfig = ""
+            graphics_include_dirs = ""
+            graphics_link_dirs = ""
+            graphics_libs = ""
 
-            cmakelists = f"""\
+        cmakelists = f"""\
 cmake_minimum_required(VERSION 3.10)
 project(NumerobisNative C)
 
@@ -237,33 +285,52 @@ if(UNIX AND NOT APPLE)
     target_link_options(numerobis_bin PRIVATE "-static-libgcc" "-pthread")
 endif()
 """
-            (temp_path / "CMakeLists.txt").write_text(cmakelists, encoding="utf-8")
-
-            cmake_config = [
-                "cmake",
-                "-B",
-                "build",
-                "-S",
-                ".",
-                f"-DCMAKE_C_COMPILER={cc}",
-                "-DCMAKE_C_COMPILER_LAUNCHER=ccache" if use_ccache else "",
-            ] + (["-G", "Ninja"] if not is_unix else [])
-            if linker:
-                cmake_config.append(f"-fuse-ld={linker}")
-
-            _run_subprocess(cmake_config, cwd=temp_path)
 
-            build_proc = _run_subprocess(["cmake", "--build", "build"], cwd=temp_path)
+        cmake_config = [
+            "cmake",
+            "-B",
+            "build",
+            "-S",
+            ".",
+            f"-DCMAKE_C_COMPILER={cc}",
+            "-DCMAKE_C_COMPILER_LAUNCHER=ccache" if use_ccache else "",
+        ] + (["-G", "Ninja"] if not is_unix else [])
+        if linker:
+            cmake_config.append(f"-fuse-ld={linker}")
+
+        # reuse a build tree configured with the same CMakeLists.txt and options
+        key = (cmakelists, tuple(cmake_config))
+        temp_dir, build_lock = _build_dir(key)
+        temp_path = Path(temp_dir.name)
+        built_binary = (
+            temp_path / "build" / ("numerobis_bin" if is_unix else "numerobis_bin.exe")
+        )
 
-            built_binary = (
-                temp_path
-                / "build"
-                / ("numerobis_bin" if is_unix else "numerobis_bin.exe")
-            )
+        with build_lock:
+            changed = {
+                name
+                for name, text in (
+                    ("units.h", units_h),
+                    ("source.c", source_c),
+                    ("main.c", main_c),
+                )
+                if _write_if_changed(temp_path / name, text)
+            }
+
+            if (temp_path / "build" / "CMakeCache.txt").exists():
+                _invalidate(temp_path, changed, built_binary)
+            else:
+                (temp_path / "CMakeLists.txt").write_text(cmakelists, encoding="utf-8")
+                try:
+                    _run_subprocess(cmake_config, cwd=temp_path)
+                except SystemExit:
+                    shutil.rmtree(temp_path / "build", ignore_errors=True)
+                    raise
 
+            build_proc = _run_subprocess(["cmake", "--build", "build"], cwd=temp_path)
             shutil.copy2(built_binary, output_path)
 
-            return build_proc
+        return build_proc
 
 
 def run(path: str | Path = "output/output", capture_output=True):
@@ -4,9 +4,11 @@ Transforms intermediate representation into compilable C source code.
 """
 
 import dataclasses
+import operator
 from decimal import Decimal
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, Callable, TypeVar
 
 from ..analysis.invert import _to_x
 from ..analysis.preprocessor import Preprocessor
@@ -54,13 +56,13 @@ from ..nodes.ast import (
     UnaryOp,
     UnitDefinition,
     Variable,
+    VariableDeclaration,
     WhileLoop,
 )
 from ..nodes.core import AstNode, Identifier, Location, UnitNode
 from ..nodes.unit import Expression, Neg, One, Power, Product, Scalar
 from ..typechecker.linking import Link
-from ..typechecker.types import FunctionType, StructInstance, StructType, T
-from ..utils import camel2snake_pattern
+from ..typechecker.types import FunctionType, StructInstance, StructType
 from .tstr import tstr
 from .utils import (
     BUILTINS,
@@ -69,14 +71,78 @@ from .utils import (
     mangle,
     module_uid,
     mthd,
-    strip_parens,
+    type_header,
     unit_uid,
 )
 
 SameType = TypeVar("SameType")
 
+# headers every compiled module depends on
+BASE_INCLUDES = frozenset(
+    {
+        "numerobis/runtime",
+        "numerobis/constants",
+        "numerobis/utils/utils",
+        "numerobis/values",
+        "numerobis/types/bool",
+        "numerobis/types/struct",
+        "numerobis/exceptions/throw",
+        "numerobis/builtins/builtins",
+        "numerobis/units/units",
+    }
+)
+
+# shared results of boolean_, indexed by the literal's value
+BOOLEANS = (tstr("VFALSE"), tstr("VTRUE"))
+
+DECIMAL_ONE = Decimal(1)
+
+EMPTY_STRING = tstr('str__init__(sdsnew(""))')
+
+
+def _number_type(node: Integer | Num) -> str:
+    """Runtime number type of a literal, decided by its text as in `number_`"""
+    # folded constants may carry a fractional value even on Integer nodes
+    if "." in str(node.value) or "." in str(node.exponent):
+        return "num"
+    return "int"
+
+
+@lru_cache(maxsize=1024)
+def _dimensionless(typ: str, value: str) -> tstr:
+    """Shared rendering of a unitless number literal, e.g. loop bounds and counters"""
+    return tstr(f"{typ}__init__({value}, U_ONE)")
+
 
 class Compiler:
+    __slots__ = (
+        "program",
+        "module",
+        "errors",
+        "simplifier",
+        "simplify",
+        "env",
+        "_nodes",
+        "_typed",
+        "header",
+        "imports",
+        "uid",
+        "prefix",
+        "include",
+        "functions",
+        "typedefs",
+        "structs",
+        "_defined_addrs",
+        "_imported_names",
+        "_imported_units",
+        "_imported_modules",
+        "_globals",
+        "_compile_cache",
+        "_generation",
+        "units",
+        "preprocessor",
+    )
+
     def __init__(
         self,
         program: list[Link],
@@ -91,23 +157,15 @@ class Compiler:
         self.simplifier = Simplifier(module=module)
         self.simplify = self.simplifier.simplify
         self.env = namespaces
+        # the namespace tables are mutated in place but never replaced
+        self._nodes = namespaces.nodes
+        self._typed = namespaces.typed
         self.header = header
         self.imports = imports
 
         self.uid = module_uid(module.path)
-        self.include = set(
-            {
-                "numerobis/runtime",
-                "numerobis/constants",
-                "numerobis/utils/utils",
-                "numerobis/values",
-                "numerobis/types/bool",
-                "numerobis/types/struct",
-                "numerobis/exceptions/throw",
-                "numerobis/builtins/builtins",
-                "numerobis/units/units",
-            }
-        )
+        self.prefix = f"und_{self.uid}_"  # prefix of names defined in this module
+        self.include = set(BASE_INCLUDES)
         self.functions: list[str] = []
         self.typedefs: list[str] = []
         self.structs: list[StructType] = []
@@ -118,6 +176,12 @@ class Compiler:
 
         self._globals: list[list[str]] = [[]]  # queue of globals of nested functions
 
+        # compiled leaf nodes, keyed by node identity; the node is kept alive
+        # alongside its result so that its id cannot be reused
+        # link target (or id of an unlinked node) -> (generation, output, node)
+        self._compile_cache: dict[int | tuple[int], tuple[int, tstr, Any]] = {}
+        self._generation = 0  # bumped whenever identifier resolution changes
+
         self.units: CompiledUnits = CompiledUnits()
 
     # These bypass the full number_binop dispatch for plain dimless integers.
@@ -134,78 +198,89 @@ class Compiler:
 
         msg = self.compile(node.msg) if node.msg else None
 
-        out = tstr("__assert__($a, $b, $op, $help, $loc)")
-        out["a"] = self.compile(a)
-        out["b"] = self.compile(b) if b else "EMPTY"
-        out["op"] = f"COMPARE_{self.unlink(op).name.upper()}" if op else "COMPARE_NONE"
-        out["help"] = f"__str__({msg}, NULL).str" if msg else "NULL"
-        out["loc"] = self.compile(node.loc)
-        return out
+        a = self.compile(a)
+        b = self.compile(b) if b else "EMPTY"
+        op = f"COMPARE_{self.unlink(op).name.upper()}" if op else "COMPARE_NONE"
+        help = f"__str__({msg}, NULL).str" if msg else "NULL"
+        loc = self.compile(node.loc)
+        return tstr(f"__assert__({a}, {b}, {op}, {help}, {loc})")
 
     def attribute_(self, node: Attribute, link: int) -> tstr:
         self.include.add("numerobis/closures")
         if "#struct" in node.meta:
             struct = node.meta["#struct"]
-            out = tstr("$struct.strukt[$i]")
-            out["struct"] = self.compile(node.owner)
-            out["i"] = struct.names.index(self.unlink(node.name).name) + 1
-            return out
+            owner = self.compile(node.owner)
+            i = struct.names.index(self.unlink(node.name).name) + 1
+            return tstr(f"{owner}.strukt[{i}]")
 
-        out = tstr("__getattr__($func, $self)")
         typ = node.meta["#type"]
-        out["func"] = self.compile(Identifier(f"{typ}.{self.unlink(node.name)}"))
-        out["self"] = self.compile(node.owner)
-        return out
+        func = self.compile(Identifier(f"{typ}.{self.unlink(node.name)}"))
+        return tstr(f"__getattr__({func}, {self.compile(node.owner)})")
 
     def bin_op_(self, node: BinOp, link: int) -> tstr:
-        operands = [self.compile(node.left), self.compile(node.right)]
-        left, right = operands[:: node.meta.get("side", 1)]
+        left, right = self.compile(node.left), self.compile(node.right)
+        if node.meta.get("side", 1) == -1:
+            left, right = right, left
         op_name = node.op.name
 
-        if op_name in self._FAST_BINOP:
+        if (macro := self._FAST_BINOP.get(op_name)) is not None:
             self.include.add("numerobis/closures")
-            macro = self._FAST_BINOP[op_name]
             return tstr(f"{macro}({left}, {right})")
 
-        out = tstr("__$func__($left, $right$loc)")
-        out["left"], out["right"] = left, right
-        out["func"] = op_name
-        out["loc"] = f", {self.compile(node.loc)}" if op_name in {"div", "pow"} else ""
-        return out
+        loc = f", {self.compile(node.loc)}" if op_name in {"div", "pow"} else ""
+        return tstr(f"__{op_name}__({left}, {right}{loc})")
 
     def block_(self, node: Block, link: int) -> tstr:
-        out = []
+        return tstr("{" + self._block_body(node) + "}")
 
+    def _block_body(self, node: AstNode) -> str:
+        """Compile a block's statements without the surrounding braces"""
+        block = self.unlink(self._make_block(node))
+        assert isinstance(block, Block)
         old_defined_addrs = self._defined_addrs.copy()
 
-        for stmt in node.body:
-            out.append(str(self.compile(stmt)) + ";")
+        compile = self.compile
+        out = "\n" + "".join([f"{compile(stmt)};\n" for stmt in block.body])
 
         self._defined_addrs = old_defined_addrs
 
-        return tstr("{\n" + "\n".join(out) + "\n}")
+        return out
 
     def boolean_(self, node: Boolean, link: int) -> tstr:
         self.include.add("stdbool")
-        return tstr(["VFALSE", "VTRUE"][node.value])
-
-    def bool_op_(self, node: BoolOp, link: int) -> tstr:
-        out = tstr("bool__init__(__cbool__($left) $op __cbool__($right))")
+        return BOOLEANS[node.value]
 
-        out["left"] = self.compile(node.left)
-        out["right"] = self.compile(node.right)
-        out["op"] = {"and": "&&", "or": "||", "xor": "^"}[node.op.name]
+    _BOOL_OPS = {"and": "&&", "or": "||", "xor": "^"}
 
-        return out
+    def bool_op_(self, node: BoolOp, link: int) -> tstr:
+        left = self._condition(node.left)
+        right = self._condition(node.right)
+        op = self._BOOL_OPS[node.op.name]
+
+        return tstr(f"bool__init__({left} {op} {right})")
+
+    def _condition(self, link: Link | Any) -> str:
+        """Compile an expression to a raw C boolean, skipping the Bool box where possible"""
+        node = self.unlink(link)
+        if isinstance(node, Compare):
+            comparisons = self._comparisons(node)
+            if len(comparisons) == 1:
+                return comparisons[0]
+            return "(" + " && ".join(comparisons) + ")"
+        if isinstance(node, Boolean):
+            self.include.add("stdbool")
+            return "true" if node.value else "false"
+        if isinstance(node, BoolOp):
+            left = self._condition(node.left)
+            right = self._condition(node.right)
+            return f"({left} {self._BOOL_OPS[node.op.name]} {right})"
+        return f"__cbool__({self.compile(link)})"
 
     def break_(self, node: Break, link: int) -> tstr:
         return tstr("break;")
 
     def call_(self, node: Call, link: int) -> tstr:
-        out = tstr("$callee($args)")
-
         callee = self.compile(node.callee)
-        out["callee"] = callee
 
         unlinked_args: list[CallArg] = [self.unlink(arg) for arg in node.args]  # type: ignore
         args = []
@@ -236,42 +311,86 @@ class Compiler:
         else:
             args = [arg.value for arg in arg_names.values()]
 
-        args = [
-            str(self.compile(arg)) if arg is not None else "EMPTY" for arg in args
-        ] + ["EMPTY"]
-
-        str_args = f"(Value[]){{{callee}, {', '.join(args)}}}"
-        out = tstr(f"__call__({callee}, {str_args}, {argc})")
+        compiled = ", ".join(
+            [str(self.compile(arg)) if arg is not None else "EMPTY" for arg in args]
+        )
+        sep = ", " if compiled else ""
 
-        return out
+        return tstr(
+            f"__call__({callee}, (Value[]){{{callee}, {compiled}{sep}EMPTY}}, {argc})"
+        )
 
     _FAST_CMP = {"le": "FAST_LE_BOOL", "lt": "FAST_LT_BOOL", "eq": "FAST_EQ_BOOL"}
 
     def compare_(self, node: Compare, link: int) -> tstr:
+        comparisons = self._comparisons(node)
+        if all(c in ("true", "false") for c in comparisons):
+            # the whole chain was folded at compile time
+            return BOOLEANS["false" not in comparisons]
+        return tstr(f"bool__init__({' && '.join(comparisons)})")
+
+    _FOLDABLE_CMP = {
+        "eq": operator.eq,
+        "ne": operator.ne,
+        "lt": operator.lt,
+        "le": operator.le,
+        "gt": operator.gt,
+        "ge": operator.ge,
+    }
+
+    def _comparisons(self, node: Compare) -> list[str]:
+        """Compile a comparison chain to raw C boolean expressions, one per operator"""
         comparators = [node.left, *node.comparators]
         values = [self.compile(c) for c in comparators]
+        literals = [self._literal(c) for c in comparators]
 
-        comparisons = []
+        comparisons = [""] * len(node.ops)
         for i, op in enumerate(node.ops):
             opname = self.unlink(op).name  # type: ignore
             left, right = values[i], values[i + 1]
 
             if node.meta["side"][i] == -1:
                 left, right = right, left
+            elif (
+                folded := self._fold_compare(opname, *literals[i : i + 2])
+            ) is not None:
+                self.include.add("stdbool")
+                comparisons[i] = "true" if folded else "false"
+                continue
 
             if opname == "ne":
                 self.include.add("numerobis/closures")
-                comparisons.append(f"(!FAST_EQ_BOOL({left}, {right}))")
-            elif opname in self._FAST_CMP:
+                comparisons[i] = f"(!FAST_EQ_BOOL({left}, {right}))"
+            elif (macro := self._FAST_CMP.get(opname)) is not None:
                 self.include.add("numerobis/closures")
-                comparisons.append(f"{self._FAST_CMP[opname]}({left}, {right})")
+                comparisons[i] = f"{macro}({left}, {right})"
             else:
-                out = tstr("__$op__($left, $right)")
-                out["left"], out["right"] = left, right
-                out["op"] = opname
-                comparisons.append(f"__cbool__({out})")
-
-        return tstr(f"bool__init__({' && '.join(comparisons)})")
+                comparisons[i] = f"__cbool__(__{opname}__({left}, {right}))"
+
+        return comparisons
+
+    def _literal(self, link: Link | Any) -> int | float | bool | None:
+        """Python value of a dimensionless number or boolean literal, if it is one"""
+        node = self.unlink(link)
+        if isinstance(node, Boolean):
+            return node.value
+        if isinstance(node, (Integer, Num)) and not node.exponent and not node.unit:
+            value = str(node.value)
+            try:
+                return int(value) if _number_type(node) == "int" else float(value)
+            except ValueError:
+                return None
+        return None
+
+    def _fold_compare(self, opname: str, left: Any, right: Any) -> bool | None:
+        """Evaluate a comparison of two literals of the same runtime type"""
+        if left is None or type(left) is not type(right):
+            return None
+        if isinstance(left, bool) and opname not in ("eq", "ne"):
+            return None
+        if (op := self._FOLDABLE_CMP.get(opname)) is None:
+            return None
+        return op(left, right)
 
     def continue_(self, node: Continue, link: int) -> tstr:
         return tstr("continue;")
@@ -290,169 +409,145 @@ class Compiler:
                 return tstr(f"number__convert__({value}, {target})")
             return value
 
-        out = tstr("__$func__($value$loc)")
-        out["value"] = self.compile(node.value)
-        out["func"] = f"{node.target.name.name.lower()}"
+        value = self.compile(node.value)
+        func = node.target.name.name.lower()
 
         if not self.unlink(node.target.name).name == "Bool":
-            out["loc"] = f", {self.compile(node.loc)}"
+            loc = f", {self.compile(node.loc)}"
         else:
-            out["loc"] = ""
+            loc = ""
 
-        return out
+        return tstr(f"__{func}__({value}{loc})")
 
     def extern_declaration_(self, node: ExternDeclaration, link: int) -> tstr:
         self.include.add("numerobis/extern")
 
-        out = tstr('Value und_$uid_$name = *u_extern_lookup("$extern_name")')
-        out["uid"] = self.uid
-
         name = self.unlink(self.unlink(node.value).name).name  # type: ignore
-        out["name"] = mangle(name)
-        out["extern_name"] = name.replace("_", "__")
+        extern_name = name.replace("_", "__")
 
-        return out
+        return tstr(
+            f'Value {self.prefix}{mangle(name)} = *u_extern_lookup("{extern_name}")'
+        )
 
     def for_loop_(self, node: ForLoop, link: int) -> tstr:
         self.include.add("numerobis/types/number")  # indices
-        if self._link2type(node.iterable) == "range":
+        iterable_type = self._link2type(node.iterable)
+        if iterable_type == "range":
             return self.for_loop_range_(node, link)
 
         if "value" not in node.meta:
             return tstr("/* empty loop */")
 
-        loop = tstr("""for (size_t $iterator = 0, $limit = $iterable_type_len($iterable).number.i64; $iterator < $limit; $iterator++) {
-            $iterator_defs
-            $body
-        }""")
-
-        body = self.compile(self._make_block(node.body))
-        loop["body"] = strip_parens(str(body), "{")
+        body = self._block_body(node.body)
 
-        iterable_type = self._link2type(node.iterable)
-        iterator_name = f"__iterator_{abs(link)}"
-        iterable_name = f"__iterable_{abs(link)}"
-        limit_name = f"__limit_{abs(link)}"
-
-        loop["iterator"], loop["iterable"], loop["limit"] = (
-            iterator_name,
-            iterable_name,
-            limit_name,
+        n = abs(link)
+        iterator_name, iterable_name, limit_name = (
+            f"__iterator_{n}",
+            f"__iterable_{n}",
+            f"__limit_{n}",
         )
-        loop["iterable_type"] = iterable_type
 
-        self.include.add(f"numerobis/types/{iterable_type}")
+        self.include.add(type_header(iterable_type))
 
         iterators = [self.unlink(iterator) for iterator in node.iterators]
 
+        iterable = self.compile(node.iterable)
+        reference = "reference" in iterable.meta
+        if reference:
+            iterable_name = str(iterable)
+
+        item = mthd(
+            "__getitem__", iterable_name, f"int__init__({iterator_name}, U_ONE)"
+        )
         if len(node.iterators) == 1:
             iterator = iterators[0]
-            loop["iterator_defs"] = (
-                f"Value und_{self.uid}_{iterator.name} = "
-                + mthd("__getitem__", "$iterable", "int__init__($iterator, U_ONE)")
-                + ";"
-            )
+            iterator_defs = f"Value {self.prefix}{iterator.name} = {item};"
         else:
             # if there are >1 iterators, it is guaranteed that the iterable is a list of lists
-            iterrow_name = f"__iterrow_{abs(link)}"
+            iterrow_name = f"__iterrow_{n}"
 
-            defs = [
-                f"Value {iterrow_name} = {mthd('__getitem__', '$iterable', 'int__init__($iterator, U_ONE)')};"
-            ]
+            defs = [f"Value {iterrow_name} = {item};"]
             for i, iterator in enumerate(iterators):
                 defs.append(
-                    f"Value und_{self.uid}_{iterator.name} = "
+                    f"Value {self.prefix}{iterator.name} = "
                     f"__getitem__({iterrow_name}, int__init__({i}, U_ONE), LOC(0, 0, 0, 0));"
                 )
-            loop["iterator_defs"] = "\n".join(defs)
+            iterator_defs = "\n".join(defs)
 
-        iterable = self.compile(node.iterable)
-        if "reference" not in iterable.meta:
-            out = tstr("{\n$iterable_def;\n$loop}")
-            out["iterable_def"] = f"Value {iterable_name} = {iterable}"
-            out["loop"] = loop
-            return out
-        else:
-            loop["iterable"] = iterable
+        loop = f"""for (size_t {iterator_name} = 0, {limit_name} = {iterable_type}_len({iterable_name}).number.i64; {iterator_name} < {limit_name}; {iterator_name}++) {{
+            {iterator_defs}
+            {body}
+        }}"""
 
-        return loop
+        if not reference:
+            return tstr(f"{{\nValue {iterable_name} = {iterable};\n{loop}}}")
+        return tstr(loop)
 
-    def for_loop_range_(self, node: ForLoop, link: int) -> tstr:
-        loop = tstr("""{
-            Range *$range = $range_def.range;
-            for ($type $i = $range->start;
-                (($range->step > 0) ? ($i < $range->stop) : ($i > $range->stop));
-                $i += $range->step)
-            {
-                Value $iv = $vtype__init__($i, U_ONE);
-                $body
-            }}""")
+    _RANGE_CTYPES = {"Int": "long", "Num": "double"}
 
-        body = self.compile(self._make_block(node.body))
-        loop["body"] = strip_parens(str(body), "{")
-        loop["i"] = f"__iterator_{abs(link)}"
-        loop["iv"] = self.compile(node.iterators[0])
+    def for_loop_range_(self, node: ForLoop, link: int) -> tstr:
+        body = self._block_body(node.body)
+        i = f"__iterator_{abs(link)}"
+        iv = self.compile(node.iterators[0])
 
-        loop["vtype"] = node.meta["value"].name().lower()  # 'int' or 'float'
-        loop["type"] = {"Int": "long", "Num": "double"}[node.meta["value"].name()]
+        value_type = node.meta["value"].name()
+        vtype = value_type.lower()  # 'int' or 'float'
+        ctype = self._RANGE_CTYPES[value_type]
 
         r = self.unlink(node.iterable)
         if not isinstance(r, Range):
-            loop["range_def"] = self.compile(node.iterable)
-            loop["range"] = f"__range_{abs(link)}"
-            return loop
+            range_def = self.compile(node.iterable)
+            rng = f"__range_{abs(link)}"
+            return tstr(f"""{{
+            Range *{rng} = {range_def}.range;
+            for ({ctype} {i} = {rng}->start;
+                (({rng}->step > 0) ? ({i} < {rng}->stop) : ({i} > {rng}->stop));
+                {i} += {rng}->step)
+            {{
+                Value {iv} = {vtype}__init__({i}, U_ONE);
+                {body}
+            }}}}""")
 
         # inline range
         assert isinstance(r, Range)
-        loop = tstr(
-            """{
-            for ($type $i = $start;
-                (($step > 0) ? ($i < $stop) : ($i > $stop));
-                $i += $step)
-            {
-                Value $iv = $vtype__init__($i, U_ONE);
-                $body
-            }}""",
-            content=loop.content,
-        )
-
+        bounds = {}
         for key, _value in [("start", r.start), ("stop", r.end), ("step", r.step)]:
             value = self.unlink(_value)
             if not value:
-                loop[key] = "1"
+                bounds[key] = "1"
             elif isinstance(value, UnaryOp) and isinstance(
                 value.operand, (Integer, Num)
             ):
                 # negative
                 value = self.unlink(value.operand)
                 value = dataclasses.replace(value, value=f"-{value.value}")
+                bounds[key] = self.number_(value, init=False)
             elif isinstance(value, (Integer, Num)):
                 # constant range
-                loop[key] = self.number_(value, init=False)
+                bounds[key] = self.number_(value, init=False)
             else:
                 part = self.compile(value)
                 typ = "i64" if self._link2type(_value) == "int" else "f64"
-                loop[key] = f"{part}.number.{typ}"
-
-        return loop
+                bounds[key] = f"{part}.number.{typ}"
+
+        start, stop, step = bounds["start"], bounds["stop"], bounds["step"]
+        return tstr(f"""{{
+            for ({ctype} {i} = {start};
+                (({step} > 0) ? ({i} < {stop}) : ({i} > {stop}));
+                {i} += {step})
+            {{
+                Value {iv} = {vtype}__init__({i}, U_ONE);
+                {body}
+            }}}}""")
 
     def function_(self, node: Function, link: int) -> tstr:
         self.include.add("numerobis/closures")
 
         old_defined_addrs = self._defined_addrs.copy()
 
-        definition = tstr("""Value $name(void *__env, Value *__args) {
-                                U_UNPACK_ENV($env)
-                                $shadow_vars
-                                Value self = __args[0];
-                                $actual_name
-                                $args
-
-                                $body
-                            }""")
         assert node.body is not None
 
-        self._defined_addrs.update(self.env.nodes[link].meta["addrs"])
+        self._defined_addrs.update(node.meta["addrs"])
         defined_addrs = {addr: name for name, addr in self._defined_addrs.items()}
 
         body_node = self.unlink(node.body)
@@ -461,22 +556,22 @@ class Compiler:
         if (
             isinstance(body_node, Block)
             and len(body_node.body) > 0
-            and isinstance(self.unlink(body_node.body[0]), Global)
+            and isinstance(globals_node := self.unlink(body_node.body[0]), Global)
         ):
-            globals_node = self.unlink(body_node.body[0])
-            assert isinstance(globals_node, Global)
             globals = [self.unlink(var).name for var in globals_node.names]
 
         self._globals.append(globals)
-        body = self.compile(self._make_block(node.body, rtrn=True))
+        self._generation += 1
+        body = self._block_body(self._make_block(node.body, rtrn=True))
         self._globals.pop()
+        self._generation += 1
 
         if (
             isinstance(body_node, Block)
             and len(body_node.body) > 0
             and not isinstance(self.unlink(body_node.body[-1]), Return)
         ):
-            body = str(body)[:-1] + "\nreturn NONE;\n}"
+            body += "\nreturn NONE;\n"
 
         self._defined_addrs = old_defined_addrs
 
@@ -484,7 +579,7 @@ class Compiler:
         params = [str(self.compile(param.name)) for param in _unlinked_params]
 
         # compile default args before scoping
-        definition["args"] = "\n".join(
+        args = "\n".join(
             f"U_UNPACK_ARG({param}, {i + 1})"
             if not _unlinked_params[i].default
             else f"U_UNPACK_OPT_ARG({param}, {i + 1}, {self.compile(_unlinked_params[i].default)})"
@@ -496,38 +591,40 @@ class Compiler:
             _unlinked_params.append(_unlinked_params.pop(0))
             params.append(params.pop(0))
 
+        imported, prefix = self._imported_names, self.prefix
         free_vars = [
-            self._imported_names.get(var, f"und_{self.uid}_")
-            + mangle(var.split("::")[-1])
+            imported.get(var, prefix) + mangle(var.split("::")[-1])
             for var in get_free_vars(
-                self.env.nodes, node, link=link, defined_addrs=defined_addrs
+                self._nodes, node, link=link, defined_addrs=defined_addrs
             )
         ]
         free_vars = list(set(free_vars))
-        mangled_globals = [
-            self._imported_names.get(var, f"und_{self.uid}_") + mangle(var)
-            for var in globals
-        ]
+        mangled_globals = [imported.get(var, prefix) + mangle(var) for var in globals]
 
-        env_type = f"__Env_{self.uid}_{abs(link)}"
+        suffix = f"{self.uid}_{abs(link)}"
+        env_type = f"__Env_{suffix}"
         name = self.compile(node.name) if node.name is not None else None
 
-        definition["body"] = strip_parens(str(body), "{")
-        definition["name"] = f"__impl_{self.uid}_{abs(link)}"
-        definition["actual_name"] = (
-            f"Value {name} = __args[0];" if name and name else ""
-        )
-        definition["env"] = env_type
+        impl_name = f"__impl_{suffix}"
+        actual_name = f"Value {name} = __args[0];" if name and name else ""
 
-        definition["shadow_vars"] = "\n".join(
+        shadow_vars = "\n".join(
             f"U_SHADOW_PTR({var})" if var in mangled_globals else f"U_SHADOW_VAR({var})"
             for var in free_vars
         )
 
-        self.functions.append(str(definition))
+        self.functions.append(f"""Value {impl_name}(void *__env, Value *__args) {{
+                                U_UNPACK_ENV({env_type})
+                                {shadow_vars}
+                                Value self = __args[0];
+                                {actual_name}
+                                {args}
+
+                                {body}
+                            }}""")
 
         env_creation = [f"&{v}" if v in mangled_globals else v for v in free_vars]
-        out = f"U_NEW_CLOSURE({definition['name']}, {env_type} {', ' + ', '.join(env_creation) if env_creation else ''})"
+        out = f"U_NEW_CLOSURE({impl_name}, {env_type} {', ' + ', '.join(env_creation) if env_creation else ''})"
 
         if name is not None:
             out = f"Value {name} = {out}"
@@ -546,12 +643,16 @@ class Compiler:
     def global_(self, node: Global, link: int) -> tstr:
         return tstr("")
 
+    def _skip(self, node: AstNode, link: int) -> tstr:
+        # header-only nodes, handled by process_header/preprocess
+        return tstr("")
+
     def identifier_(self, node: Identifier, link: int) -> tstr:
         if "link" in node.meta:
             # function name in its own body
             return tstr("self", meta={"reference": True})
 
-        prefix = self._imported_names.get(node.name, f"und_{self.uid}_")
+        prefix = self._imported_names.get(node.name, self.prefix)
         star = "(*" if node.name in self._globals[-1] else ""
         suffix = ")" if star else ""
 
@@ -560,122 +661,102 @@ class Compiler:
         )
 
     def if_(self, node: If, link: int) -> tstr:
-        if node.expression:
-            out = tstr("(__cbool__($condition) ? ($then) : ($else))")
-        else:
-            out = tstr("if (__cbool__($condition)) { $then }") + (
-                tstr("else { $else }") if node.else_branch else ""
-            )
-
-        out["condition"] = self.compile(node.condition)
+        condition = self._condition(node.condition)
         old_defined_addrs = self._defined_addrs.copy()
-        out["then"] = self.compile(node.then_branch)
+        then = self.compile(node.then_branch)
         self._defined_addrs = old_defined_addrs
-        out["else"] = self.compile(node.else_branch) if node.else_branch else ""
+        else_ = self.compile(node.else_branch) if node.else_branch else ""
 
-        if not node.expression:
-            out["then"] = ensuresuffix(str(out["then"]), ";")  # type: ignore
-            out["else"] = ensuresuffix(str(out["else"]), ";")  # type: ignore
+        if node.expression:
+            return tstr(f"({condition} ? ({then}) : ({else_}))")
 
-        return out
+        out = f"if ({condition}) {{ {ensuresuffix(str(then), ';')} }}"
+        if node.else_branch:
+            out += f"else {{ {ensuresuffix(str(else_), ';')} }}"
+        return tstr(out)
 
     def index_(self, node: Index, link: int) -> tstr:
         if self._link2type(node.index) == "slice":
             return self.slice_(node, link)
 
         if (iterable_type := self._link2type(node.iterable)) not in ("any", "never"):
-            self.include.add(f"numerobis/types/{iterable_type}")
+            self.include.add(type_header(iterable_type))
 
-        out = tstr("__getitem__($iterable, $index, $loc)")
-        out["index"] = str(self.compile(node.index))
-        out["iterable"] = str(self.compile(node.iterable))
-
-        loc = self.unlink(node.index).loc
-        out["loc"] = self.compile(loc)
-        return out
+        index = self.compile(node.index)
+        iterable = self.compile(node.iterable)
+        loc = self.compile(self.unlink(node.index).loc)
+        return tstr(f"__getitem__({iterable}, {index}, {loc})")
 
     def index_assignment_(self, node: IndexAssignment, link: int) -> tstr:
-        out = tstr("__setitem__($target, $index, $value, $loc)")
         target: Index = self.unlink(node.target)  # type: ignore
 
-        out["target"] = str(self.compile(target.iterable))
-        out["index"] = str(self.compile(target.index))
-        out["value"] = str(self.compile(node.value))
+        iterable = self.compile(target.iterable)
+        index = self.compile(target.index)
+        value = self.compile(node.value)
+        loc = self.compile(self.unlink(target.index).loc)
 
-        loc = self.unlink(target.index).loc
-        out["loc"] = self.compile(loc)
+        return tstr(f"__setitem__({iterable}, {index}, {value}, {loc})")
 
-        return out
+    _LIST_INCLUDES = frozenset({"numerobis/types/list", "numerobis/types/number"})
 
     def list_(self, node: List, link: int) -> tstr:
-        self.include.add("numerobis/types/list")
-        self.include.add("numerobis/types/number")
+        self.include |= self._LIST_INCLUDES
 
         if not node.items:
             return tstr("list_of(NULL, 0)")
 
-        out = tstr("list_of((Value[])$items, $len)")
-
-        out["len"] = str(len(node.items))
         items = ", ".join([str(self.compile(item)) for item in node.items])
-        out["items"] = "{" + items + "}"
-
-        return out
+        return tstr(f"list_of((Value[]){{{items}}}, {len(node.items)})")
 
     def location_(self, loc: Location, link: int) -> tstr:
         return tstr(f"LOC({loc.line}, {loc.col}, {loc.end_line}, {loc.end_col})")
 
     def module_access_(self, node: ModuleAccess, link: int) -> tstr:
-        out = tstr("$prefix$name", meta={"reference": True})
         mod = self.unlink(node.module).name
-        out["prefix"] = "und_" + self._imported_modules[mod] + "_"
+        prefix = "und_" + self._imported_modules[mod] + "_"
 
         name = self.unlink(node.name).name
-        out["name"] = mangle(name)
-        self._imported_names[f"{mod}::{name}"] = out["prefix"]
-        return out
+        self._imported_names[f"{mod}::{name}"] = prefix
+        self._generation += 1
+        return tstr(prefix + mangle(name), meta={"reference": True})
 
-    def number_(self, node: Integer | Num, *, init: bool = True) -> tstr:
+    def number_(
+        self, node: Integer | Num, link: int = -1, *, init: bool = True
+    ) -> tstr:
         self.include.add("numerobis/types/number")
-        out = tstr("$type__init__($value, $unit)") if init else tstr("$value")
-
-        value = node.value
-        typ = "num"
-        if "." not in str(value) and "." not in str(node.exponent):
-            out["value"] = f"{value}{f'E{node.exponent}' if node.exponent else ''}L"
-            typ = "int"
-        elif not node.exponent:
-            out["value"] = str(value)
-        else:
-            out["value"] = f"{value}E{node.exponent}"
 
-        if init:
-            out["type"] = typ
-            unit = self.unit_suffix_(self.simplify(node.unit, do_cancel=False))
-            out["unit"] = unit
+        value, exponent = str(node.value), node.exponent
+        typ = _number_type(node)
+        if typ == "int":
+            value = f"{value}E{exponent}L" if exponent else f"{value}L"
+        elif exponent:
+            value = f"{value}E{exponent}"
 
-        return out
+        if not init:
+            return tstr(value)
+
+        if not node.unit:
+            # dimensionless literal, nothing to simplify
+            return _dimensionless(typ, value)
+        unit = self.unit_suffix_(self.simplify(node.unit, do_cancel=False))
+        return tstr(f"{typ}__init__({value}, {unit})")
 
     def range_(self, node: Range, link: int) -> tstr:
         self.include.add("numerobis/types/range")
-        start, stop, step = (
-            self.compile(node.start),
-            self.compile(node.end),
-            self.compile(node.step) if node.step else "1",
-        )
-        start, stop, step = [
-            str(x)
-            .removeprefix("int__init__(")
-            .removeprefix("float__init__(")
-            .removesuffix(")")
-            .replace(", U_ONE", "")
-            .strip()
-            for x in [start, stop, step]
-        ]
+        start, stop = self._range_bound(node.start), self._range_bound(node.end)
+        step = self._range_bound(node.step) if node.step else "1"
         return tstr(
             f"range__init__((Range){{ .start = {start}, .stop = {stop}, .step = {step} }})"
         )
 
+    def _range_bound(self, link: Link | Any) -> str:
+        """Compile a range bound to a raw C number."""
+        value = self.unlink(link)
+        if isinstance(value, (Integer, Num)):
+            return str(self.number_(value, init=False))
+        typ = "i64" if self._link2type(link) == "int" else "f64"
+        return f"{self.compile(link)}.number.{typ}"
+
     def return_(self, node: Return, link: int) -> tstr:
         if self.unlink(node.value) is None:
             return tstr("return NONE")
@@ -684,21 +765,23 @@ class Compiler:
     def slice_(self, node: Index, link: int) -> tstr:
         index = self.unlink(node.index)
         assert isinstance(index, Slice)
-        out = tstr("__getslice__($this, $start, $stop, $step)")
-
-        out["this"] = self.compile(node.iterable)
-        out["start"] = self.compile(index.start) if index.start is not None else "NONE"
-        out["stop"] = self.compile(index.stop) if index.stop is not None else "NONE"
-        out["step"] = self.compile(index.step) if index.step is not None else "NONE"
+        this = self.compile(node.iterable)
+        start = self.compile(index.start) if index.start is not None else "NONE"
+        stop = self.compile(index.stop) if index.stop is not None else "NONE"
+        step = self.compile(index.step) if index.step is not None else "NONE"
 
         if (iterable_type := self._link2type(node.iterable)) != "any":
-            self.include.add(f"numerobis/types/{iterable_type}")
+            self.include.add(type_header(iterable_type))
 
-        return out
+        return tstr(f"__getslice__({this}, {start}, {stop}, {step})")
+
+    # str.c includes number.h
+    _STR_INCLUDES = frozenset({"numerobis/types/str", "numerobis/types/number"})
 
     def string_(self, node: String, link: int) -> tstr:
-        self.include.add("numerobis/types/str")
-        self.include.add("numerobis/types/number")  # str.c includes number.h
+        self.include |= self._STR_INCLUDES
+        if node.value == '""':
+            return EMPTY_STRING
         return tstr(f"str__init__(sdsnew({node.value}))")
 
     def struct_(self, node: Struct, link: int) -> tstr:
@@ -707,8 +790,6 @@ class Compiler:
         return tstr("")
 
     def struct_assignment_(self, node: StructAssignment, link: int) -> tstr:
-        out = tstr("$name.strukt[$index] = $value")
-
         node = self.unlink(node)
         target = self.unlink(node.target)
         struct = node.meta["#struct"]
@@ -716,26 +797,22 @@ class Compiler:
 
         name = self.unlink(target.name).name
 
-        out["index"] = str(struct.struct.names.index(name) + 1)
-        out["name"] = self.compile(target.owner)
-        out["value"] = self.compile(node.value)
+        index = struct.struct.names.index(name) + 1
+        owner = self.compile(target.owner)
+        value = self.compile(node.value)
 
-        return out
+        return tstr(f"{owner}.strukt[{index}] = {value}")
 
     def struct_init_(self, node: StructInit, link: int) -> tstr:
-        out = tstr("struct__init__$argc($id, $args)")
-
         name = self.unlink(node.name).name
         uid = (
             self._imported_names.get(name, self.uid)
             .removeprefix("und_")
             .removesuffix("_")
         )
-        out["name"] = str(name)
 
         struct = node.meta["#struct"]
         id_ = f"STRUCT_{name}_{uid}_{node.meta['#struct']._fingerprint[:8]}"
-        out["id"] = id_
         unlinked_args: list[CallArg] = [self.unlink(arg) for arg in node.args]  # type: ignore
         args = []
 
@@ -760,10 +837,7 @@ class Compiler:
             )
 
         args = [str(self.compile(arg)) for arg in args]
-        out["argc"] = str(len(args))
-        out["args"] = ",".join(args)
-
-        return out
+        return tstr(f"struct__init__{len(args)}({id_}, {','.join(args)})")
 
     def unary_op_(self, node: UnaryOp, link: int) -> tstr:
         self.include.add("numerobis/types/bool")
@@ -771,7 +845,7 @@ class Compiler:
         if node.op.name == "sub":
             return tstr(f"__neg__({self.compile(node.operand)})")
         elif node.op.name == "not":
-            return tstr(f"(__cbool__({self.compile(node.operand)}) ? VFALSE : VTRUE)")
+            return tstr(f"({self._condition(node.operand)} ? VFALSE : VTRUE)")
         else:
             raise ValueError(f"Unknown unary operator {node.op.name}")
 
@@ -790,9 +864,9 @@ class Compiler:
                 return self._unit_suffix_(node.value)
             case Product():
                 if not node.values:
-                    return Decimal(1), ""
+                    return DECIMAL_ONE, ""
 
-                scalar = Decimal(1)
+                scalar = DECIMAL_ONE
                 values = []
                 for v in node.values:
                     n, value = self._unit_suffix_(v)
@@ -809,11 +883,9 @@ class Compiler:
             case Scalar():
                 return (node.value, "")
             case Identifier():
-                module = self._imported_units.get(node.name, {"module": self.uid})[
-                    "module"
-                ]
-                enum = unit_uid(node.name, module)
-                return Decimal(1), f"UF({enum}, 1)"
+                imported = self._imported_units.get(node.name)
+                module = imported["module"] if imported is not None else self.uid
+                return DECIMAL_ONE, f"UF({unit_uid(node.name, module)}, 1)"
             case Neg():
                 n, value = self._unit_suffix_(node.value)
                 return Decimal(-1) * n, value
@@ -824,24 +896,20 @@ class Compiler:
         target[unit_uid(name, self.uid)] = compile_math(node.value)
 
     def variable_(self, node: Variable, link: int) -> tstr:
-        out = tstr("$name = $value")
-        addr = node.meta["address"]
-
-        out["name"] = self.compile(node.name)
-        out["value"] = self.compile(node.value)
+        target = self.compile(node.name)
+        value = self.compile(node.value)
 
         name = self.unlink(node.name).name
 
+        decl = ""
         if name not in self._defined_addrs and name not in self._globals[-1]:
-            self._defined_addrs[name] = addr
-            out = tstr("Value ") + out
+            self._defined_addrs[name] = node.meta["address"]
+            decl = "Value "
 
-        return out
+        return tstr(f"{decl}{target} = {value}")
 
     def variable_declaration_(self, node: Variable, link: int) -> tstr:
-        out = tstr("Value $name")
-
-        out["name"] = self.compile(node.name)
+        out = tstr(f"Value {self.compile(node.name)}")
 
         name = self.unlink(node.name).name
         self._defined_addrs[name] = node.meta["address"]
@@ -849,30 +917,17 @@ class Compiler:
         return out
 
     def while_loop_(self, node: WhileLoop, link: int) -> tstr:
-        condition = self.compile(node.condition)
+        condition = self._condition(node.condition)
         body = self.compile(self._make_block(node.body))
 
-        cond_node = (
-            self.unlink(node.condition)
-            if isinstance(node.condition, (int, Link))
-            else node.condition
-        )
-        cond_str = str(condition)
-        if isinstance(cond_node, Compare):
-            prefix, suffix = "bool__init__(", ")"
-            if cond_str.startswith(prefix) and cond_str.endswith(suffix):
-                cond_str = cond_str[len(prefix) : -len(suffix)]
-        else:
-            cond_str = f"__cbool__({cond_str})"
-
-        out = tstr(f"while ({cond_str}) $body")
-        out["body"] = body
-        return out
+        return tstr(f"while ({condition}) {body}")
 
     def unlink(self, link: SameType) -> SameType:
-        if isinstance(link, (int, Link)):
-            target = link if isinstance(link, int) else link.target
-            return self.env.nodes[target]  # type: ignore
+        # Link is never subclassed, so an exact type check suffices
+        if type(link) is Link:
+            return self._nodes[link.target]
+        if isinstance(link, int):
+            return self._nodes[link]  # type: ignore
         return link
 
     def preprocess(self):
@@ -900,43 +955,47 @@ class Compiler:
         for n in self.preprocessor.logarithmic:
             self.units.logarithmic.add(unit_uid(n, self.uid))
 
+    # leaf nodes whose output depends only on the node itself
+    _PURE = (Integer, Num, String, Boolean, Location)
+
     def compile(self, link: Link | Any) -> tstr:
-        node = self.unlink(link) if isinstance(link, Link) else link
+        if type(link) is Link:
+            key, target, node = link.target, link.target, None
+        else:
+            key, target, node = (id(link),), -1, link
 
-        match node:
-            case Integer() | Num():
-                return self.number_(node)
-            case (
-                Import()
-                | FromImport()
-                | DimensionDefinition()
-                | UnitDefinition()
-                | Debug()
-            ):
-                return tstr("")
-            case _:
-                name = camel2snake_pattern.sub("_", type(node).__name__).lower() + "_"
+        cached = self._compile_cache.get(key)
+        if cached is not None and cached[0] in (-1, self._generation):
+            return cached[1]
 
-                if hasattr(self, name):
-                    return getattr(self, name)(
-                        node, link=link.target if isinstance(link, Link) else -1
-                    )
-                else:
-                    raise NotImplementedError(
-                        f"AST node {type(node).__name__} not implemented"
-                    )
+        if node is None:
+            node = self._nodes[target]
+
+        # dispatched inline to keep one Python frame per visited node
+        visitor = self._DISPATCH.get(type(node))
+        if visitor is None:
+            raise NotImplementedError(f"AST node {type(node).__name__} not implemented")
+
+        if isinstance(node, self._PURE):
+            generation = -1
+        elif isinstance(node, Identifier):
+            generation = self._generation
+        else:
+            return visitor(self, node, link=target)
+
+        out = visitor(self, node, link=target)
+        self._compile_cache[key] = (generation, out, node)
+        return out
 
     def start(self) -> CompiledModule:
         self.process_header()
         self.preprocess()
         self._builtins()
 
-        code = []
-        for link in self.program:
-            if stmt := str(self.compile(link)):
-                code.append(stmt + ";")
-
-        code = "\n".join(code).strip()
+        compile = self.compile
+        code = "\n".join(
+            [stmt + ";" for link in self.program if (stmt := str(compile(link)))]
+        ).strip()
 
         self.env.foreign = {
             name: uid.removeprefix("und_").removesuffix("_")
@@ -992,16 +1051,57 @@ class Compiler:
         uid = module_uid(Path("stdlib") / "builtins.nbis")
         self._imported_names.update({name: f"und_{uid}_" for name in BUILTINS})
 
-    def _node2type(self, node) -> T:
-        return self.env.names[node.meta["address"]]
-
     def _link2type(self, link: int | Link | Any) -> str:
-        link = link.target if isinstance(link, Link) else link
+        if type(link) is Link:
+            return self._typed[link.target]
         if not isinstance(link, int):
             raise TypeError(f"Expected int, got {type(link).__name__}")
-        return self.env.typed[link]
+        return self._typed[link]
 
     def _make_block(self, node: AstNode, rtrn: bool = False) -> Block:
         if isinstance(self.unlink(node), Block):
             return node  # type: ignore
         return Block(body=[Return(value=node)]) if rtrn else Block(body=[node])
+
+    # node type -> visitor
+    _DISPATCH: dict[type, Callable[..., tstr]] = {
+        Assertion: assertion_,
+        Attribute: attribute_,
+        BinOp: bin_op_,
+        Block: block_,
+        Boolean: boolean_,
+        BoolOp: bool_op_,
+        Break: break_,
+        Call: call_,
+        Compare: compare_,
+        Continue: continue_,
+        Conversion: conversion_,
+        ExternDeclaration: extern_declaration_,
+        ForLoop: for_loop_,
+        Function: function_,
+        Global: global_,
+        Identifier: identifier_,
+        If: if_,
+        Index: index_,
+        IndexAssignment: index_assignment_,
+        Integer: number_,
+        List: list_,
+        Location: location_,
+        ModuleAccess: module_access_,
+        Num: number_,
+        Range: range_,
+        Return: return_,
+        String: string_,
+        Struct: struct_,
+        StructAssignment: struct_assignment_,
+        StructInit: struct_init_,
+        UnaryOp: unary_op_,
+        Variable: variable_,
+        VariableDeclaration: variable_declaration_,
+        WhileLoop: while_loop_,
+        Import: _skip,
+        FromImport: _skip,
+        DimensionDefinition: _skip,
+        UnitDefinition: _skip,
+        Debug: _skip,
+    }
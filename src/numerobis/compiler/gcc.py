@@ -1,6 +1,8 @@
 """GCC compiler integration for generating native executables from C code."""
 
+import json
 import os
+import shutil
 import subprocess
 import tempfile
 from functools import lru_cache
@@ -14,21 +16,77 @@ from ..classes import CompiledUnits, ModuleMeta
 from .utils import repr_double
 
 
-@lru_cache(maxsize=None)
-def _pkg(name: str):
-    cflags = (
-        subprocess.check_output(["pkg-config", "--cflags", name], text=True)
-        .strip()
-        .split()
-    )
-    libs = (
-        subprocess.check_output(["pkg-config", "--libs", name], text=True)
+def _query_pkg(names: tuple[str, ...]) -> tuple[list[str], list[str]]:
+    """Query cflags and libs of all packages with a single pkg-config call"""
+    flags = (
+        subprocess.check_output(["pkg-config", "--cflags", "--libs", *names], text=True)
         .strip()
         .split()
     )
+    libs = [flag for flag in flags if flag.startswith(("-l", "-L", "-Wl,"))]
+    cflags = [flag for flag in flags if not flag.startswith(("-l", "-L", "-Wl,"))]
+    return cflags, libs
+
+
+def _pkg_cache_file() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "numerobis" / "pkg.json"
+
+
+def _pkg_cache_key(names: tuple[str, ...]) -> Optional[str]:
+    """Identify the pkg-config installation and search path a query ran against"""
+    if (binary := shutil.which("pkg-config")) is None:
+        return None
+    search_path = os.environ.get("PKG_CONFIG_PATH", "")
+    return f"{binary}:{os.stat(binary).st_mtime_ns}:{search_path}:{' '.join(names)}"
+
+
+def _dirs_exist(flags: list[str]) -> bool:
+    return all(Path(flag[2:]).is_dir() for flag in flags if flag[:2] in ("-I", "-L"))
+
+
+@lru_cache(maxsize=None)
+def _pkg(*names: str) -> tuple[list[str], list[str]]:
+    """
+    pkg-config flags of the given packages. Set NUMEROBIS_PKG_CACHE=1 to also persist
+    them across runs in the user's cache directory.
+    """
+    if os.environ.get("NUMEROBIS_PKG_CACHE") != "1" or not (
+        key := _pkg_cache_key(names)
+    ):
+        return _query_pkg(names)
+
+    path = _pkg_cache_file()
+    try:
+        cache = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    # entries pointing at removed directories are stale after a package upgrade
+    if (entry := cache.get(key)) is not None and _dirs_exist(entry[0] + entry[1]):
+        return entry[0], entry[1]
+
+    cflags, libs = _query_pkg(names)
+    cache[key] = [cflags, libs]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
     return cflags, libs
 
 
+def _write_temp(data: str, suffix: str) -> str:
+    """Write `data` to a fresh temporary file and return its path"""
+    fd, name = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data.encode("utf-8"))
+    return name
+
+
 def _prepare_units_h(units: CompiledUnits) -> str:
     out = f"""#ifndef NUMEROBIS_UNITS_DEF_H
     #define NUMEROBIS_UNITS_DEF_H
@@ -143,28 +201,12 @@ def compile(
     use_ccache: bool = False,
 ):
     if use_graphics:
-        sdl2_cflags, sdl2_libs = _pkg("sdl2")
-        sdl2_ttf_cflags, sdl2_ttf_libs = _pkg("SDL2_ttf")
+        sdl2_cflags, sdl2_libs = _pkg("sdl2", "SDL2_ttf")
     else:
-        sdl2_cflags = sdl2_libs = sdl2_ttf_cflags = sdl2_ttf_libs = []
-
-    units_h = _prepare_units_h(units)
-
-    tmp_units = tempfile.NamedTemporaryFile(delete=False, suffix=".h")
-    tmp_units.write(units_h.encode("utf-8"))
-    tmp_units.close()
-
-    source = _prepare_source_c(modules, tmp_units.name, units)
-
-    tmp_source = tempfile.NamedTemporaryFile(delete=False, suffix=".c")
-    tmp_source.write(source.encode("utf-8"))
-    tmp_source.close()
-
-    code = f'#include "{tmp_units.name}"\n{code}'
+        sdl2_cflags = sdl2_libs = []
 
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".c")
-    tmp.write(code.encode("utf-8"))
-    tmp.close()
+    tmp_units = _write_temp(_prepare_units_h(units), ".h")
+    tmp_source = _write_temp(_prepare_source_c(modules, tmp_units, units), ".c")
 
     flags = {"-O3", "-march=native"} | flags
     if is_unix:
@@ -184,7 +226,6 @@ def compile(
                 "-Wl,--no-whole-archive",
             ]
             + sdl2_libs
-            + sdl2_ttf_libs
             if use_graphics
             else []
         )
@@ -194,11 +235,12 @@ def compile(
             + [cc]
             + ([f"-fuse-ld={linker}"] if linker else [])
             + ["-pipe"]
-            + [tmp.name, tmp_source.name]
+            # the program itself is piped through stdin; "-x none" restores
+            # extension-based detection for the archives that follow
+            + [tmp_source, "-x", "c", "-", "-x", "none"]
             + ["-o", str(output)]
             + [f"-I{runtime_path}"]
             + sdl2_cflags
-            + sdl2_ttf_cflags
             + [
                 "-Wl,--whole-archive",
                 str(runtime_path / "libruntime.a"),
@@ -213,6 +255,7 @@ def compile(
     try:
         proc = subprocess.run(
             cmd,
+            input=f'#include "{tmp_units}"\n{code}',
             check=False,
             text=True,
             capture_output=True,
@@ -225,9 +268,8 @@ def compile(
             )
         return proc
     finally:
-        os.unlink(tmp.name)
-        os.unlink(tmp_source.name)
-        os.unlink(tmp_units.name)
+        os.unlink(tmp_source)
+        os.unlink(tmp_units)
 
 
 def run(path: str | Path = "output/output", capture_output=True):
@@ -1,5 +1,6 @@
 """Linker for combining compiled modules."""
 
+import shutil
 import subprocess
 from functools import lru_cache
 from pathlib import Path
@@ -14,10 +15,32 @@ from ..typechecker.types import StructType
 from ..utils import STDLIB_PATH
 from . import cmake
 from . import gcc as gnucc
-from .tstr import tstr
 from .utils import module_uid
 
 
+@lru_cache(maxsize=None)
+def _clang_format_path() -> Optional[str]:
+    return shutil.which("clang-format")
+
+
+def _clang_format(code: str) -> str:
+    """Pretty-print C code for display, leaving it unchanged if clang-format is unavailable"""
+    if (clang_format := _clang_format_path()) is None:
+        return code
+    proc = subprocess.run(
+        [clang_format, "--assume-filename=main.c"],
+        input=code,
+        text=True,
+        capture_output=True,
+    )
+    return proc.stdout if proc.returncode == 0 else code
+
+
+@lru_cache(maxsize=None)
+def _has_ccache() -> bool:
+    return shutil.which("ccache") is not None
+
+
 class Linker:
     def __init__(self, modules: dict[str, CompiledModule], main: Path):
         self.modules = modules
@@ -69,18 +92,14 @@ class Linker:
 
         for fieldc in fieldcounts:
             # Generic struct init function for structs with `fieldc` fields
-            init = tstr("""static inline Value struct__init__$n(long id, $args)
-{
-    Value v = struct__init__(id, $n);
-    $fields
+            args = ", ".join(f"Value a{i}" for i in range(fieldc))
+            fields = "\n".join(f"v.strukt[{i + 1}] = a{i};" for i in range(fieldc))
+            funcs.append(f"""static inline Value struct__init__{fieldc}(long id, {args})
+{{
+    Value v = struct__init__(id, {fieldc});
+    {fields}
     return v;
-}""")
-            init["n"] = str(fieldc)
-            init["args"] = ", ".join(f"Value a{i}" for i in range(fieldc))
-            init["fields"] = "\n".join(
-                f"v.strukt[{i + 1}] = a{i};" for i in range(fieldc)
-            )
-            funcs.append(str(init))
+}}""")
 
         # Struct registry entry
         for struct in structs:
@@ -98,39 +117,13 @@ class Linker:
     def link(self, print_: bool = False, format: bool = False):
         self.process_module(self.modules[str(self.main)])
 
-        code = tstr("""$include
-
-                    $typedefs
-
-                    enum NumerobisFile {
-                        $filehashes
-                    };
-
-                    const char* NUMEROBIS__FILES__[] = {
-                        $filenames
-                    };
-                    char **NUMEROBIS__ARGV__;
-                    int NUMEROBIS__ARGC__;
-
-                    extern void u_init_module_registry(void);
-
-                    $structs
-
-                    $functions
-
-                    int main(int argc, char **argv) {
-                        NUMEROBIS__ARGV__ = argv;
-                        NUMEROBIS__ARGC__ = argc;
-
-                        u_init_module_registry();
-
-                        $output
-                        return 0;
-                    }""")
-
-        code["include"] = "\n".join([f"#include <{lib}.h>" for lib in self.include])
-        code["filehashes"] = ", ".join([f"__FILE__{uid}" for uid in self.order[1]])
-        code["filenames"] = ", ".join(
+        include = (
+            "#include <" + ".h>\n#include <".join(self.include) + ".h>"
+            if self.include
+            else ""
+        )
+        filehashes = ", ".join([f"__FILE__{uid}" for uid in self.order[1]])
+        filenames = ", ".join(
             [f'"{self._path(file).replace("\\", "\\\\")}"' for file in self.order[0]]
         )
 
@@ -153,16 +146,39 @@ class Linker:
         struct_funcs, struct_defs = self._structs(structs)
         functions = struct_funcs + functions
 
-        code["output"] = "\n\n".join(output)
-        code["functions"] = "\n\n".join(functions)
-        code["typedefs"] = "\n\n".join(typedefs)
-        code["structs"] = struct_defs
+        code = f"""{include}
+
+                    {"\n\n".join(typedefs)}
+
+                    enum NumerobisFile {{
+                        {filehashes}
+                    }};
+
+                    const char* NUMEROBIS__FILES__[] = {{
+                        {filenames}
+                    }};
+                    char **NUMEROBIS__ARGV__;
+                    int NUMEROBIS__ARGC__;
+
+                    extern void u_init_module_registry(void);
+
+                    {struct_defs}
+
+                    {"\n\n".join(functions)}
+
+                    int main(int argc, char **argv) {{
+                        NUMEROBIS__ARGV__ = argv;
+                        NUMEROBIS__ARGC__ = argc;
+
+                        u_init_module_registry();
+
+                        {"\n\n".join(output)}
+                        return 0;
+                    }}"""
 
-        code = str(code).strip()
+        code = code.strip()
         if format:
-            code = subprocess.run(
-                ["clang-format"], input=code, text=True, capture_output=True
-            ).stdout
+            code = _clang_format(code)
 
         if print_:
             if not format:
@@ -195,8 +211,11 @@ class Linker:
         cc: str = "gcc",
         linker: Optional[str] = None,
         use_cmake: bool = True,
-        use_ccache: bool = False,
+        use_ccache: Optional[bool] = None,
     ):
+        if use_ccache is None:
+            # the gcc backend compiles and links in one call, which ccache cannot cache
+            use_ccache = use_cmake and _has_ccache()
         units = CompiledUnits(
             units={
                 k: v for m in self.modules.values() for k, v in m.units.units.items()
@@ -1,7 +1,8 @@
 """Variable scoping and closure analysis for function definitions."""
 
 import dataclasses
-from typing import Any
+from functools import cache
+from typing import Any, Optional
 
 from numerobis.nodes.unit import Expression
 
@@ -18,6 +19,20 @@ from ..nodes.core import AstNode, Identifier
 from ..typechecker.linking import Link
 from ..typechecker.linking import unlink as _unlink
 
+_SKIPPED_FIELDS = ("name", "annotation", "unit", "meta", "_meta")
+
+
+@cache
+def _visited_fields(cls: type) -> Optional[tuple[str, ...]]:
+    """Names of the fields `get_free_vars` descends into, or None for non-dataclasses"""
+    if not dataclasses.is_dataclass(cls):
+        return None
+    return tuple(
+        field.name
+        for field in dataclasses.fields(cls)
+        if field.name not in _SKIPPED_FIELDS
+    )
+
 
 def get_free_vars(
     table: dict[int, AstNode], node: Function, link: int, defined_addrs: dict[str, str]
@@ -36,9 +51,8 @@ def get_free_vars(
         if isinstance(n, Link):
             n = table[n.target]
 
-        try:
-            fields = dataclasses.fields(n)
-        except TypeError:
+        fields = _visited_fields(type(n))
+        if fields is None:
             return
 
         match n:
@@ -89,10 +103,7 @@ def get_free_vars(
                 return
 
         for field in fields:
-            if field.name in ("name", "annotation", "unit", "meta", "_meta"):
-                continue
-
-            val = getattr(n, field.name)
+            val = getattr(n, field)
             if isinstance(val, (list, tuple)):
                 for item in val:
                     visit(item, current_defined)
@@ -3,25 +3,29 @@
 import re
 from typing import Any, Optional
 
+_PLACEHOLDER = re.compile(r"\$(\w+)")
+
 
 class tstr:
+    __slots__ = ("value", "content", "meta")
+
     def __init__(
         self,
         value: str,
         *,
-        content: dict[str, "str|tstr"] = {},
-        meta: dict[str, Any] = {},
+        content: Optional[dict[str, "str|tstr"]] = None,
+        meta: Optional[dict[str, Any]] = None,
     ):
         self.value: str = value
-        self.content: dict[str, "str|tstr"] = dict(content)
-        self.meta: dict[str, Any] = dict(meta)
+        self.content: dict[str, "str|tstr"] = {} if content is None else dict(content)
+        self.meta: dict[str, Any] = {} if meta is None else dict(meta)
 
     def remove(self, *keys: str):
         if not keys:
             keys = tuple(
-                key
-                for key in re.findall(r"\$\w+", self.value)
-                if key not in self.content
+                match.group(0)
+                for match in _PLACEHOLDER.finditer(self.value)
+                if match.group(0) not in self.content
             )
         for key in keys:
             self.value = self.value.replace(f"${key}", "")
@@ -37,10 +41,12 @@ class tstr:
         return self.content.get(key)
 
     def __str__(self) -> str:
-        filled = self.value
-        for key in sorted(self.content, key=len, reverse=True):
-            filled = filled.replace(f"${key}", str(self.content[key]))
-        return filled
+        if not self.content:
+            return self.value
+        resolved = {key: str(value) for key, value in self.content.items()}
+        return _PLACEHOLDER.sub(
+            lambda m: resolved.get(m.group(1), m.group(0)), self.value
+        )
 
     def __repr__(self) -> str:
         return f"tstr('{self.value}')"
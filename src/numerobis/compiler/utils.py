@@ -33,19 +33,31 @@ def mthd(name, *args):
     return f"NUMEROBIS_METHODS[{args[0]}.type]->{name}({', '.join(args)})"
 
 
+_C_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+
 def repr_double(s):
+    escaped = s.translate(_C_ESCAPES)
+    if escaped.isprintable():
+        # backslashes, quotes and whitespace controls were the only escapes needed
+        return '"' + escaped + '"'
     single = "'" + repr('"' + s)[2:]
     return '"' + single[1:-1].replace('"', '\\"').replace("\\'", "'") + '"'
 
 
+_CLOSING = {"(": ")", "[": "]", "{": "}"}
+
+
 def strip_parens(s: str, char: Literal["(", "[", "{"]) -> str:
     s = s.strip()
-    rchar = {"(": ")", "[": "]", "{": "}"}
-    if s.startswith(char) and s.endswith(rchar[char]):
+    if s.startswith(char) and s.endswith(_CLOSING[char]):
         s = s[1:-1]
     return s
 
 
+@lru_cache(maxsize=None)
 def mangle(name: str) -> str:
     name = name.replace("_", "__").replace(".", "_d")
     return re.sub(r"[^a-zA-Z0-9_]", lambda m: f"_u{ord(m.group(0)):04x}", name)
@@ -72,6 +84,11 @@ def compile_math(node: UnitNode) -> str:
             raise NotImplementedError(f"Unit node cannot be compiled: {type(node)}")
 
 
+@lru_cache(maxsize=None)
+def type_header(name: str) -> str:
+    return f"numerobis/types/{name}"
+
+
 @lru_cache(maxsize=None)
 def module_uid(path: str | Path) -> str:
     uid = md5(str(Path(path).resolve()).encode()).hexdigest()[:8]
@@ -1,6 +1,6 @@
 """Namespace and environment management for symbol resolution and scoping."""
 
-import uuid
+import itertools
 from difflib import get_close_matches
 from typing import Any, Callable, Literal, Optional, overload
 
@@ -8,11 +8,26 @@ from .nodes.core import AstNode
 from .nodes.unit import AnyDim, Expression, One
 from .typechecker.types import T
 
+# suffixes for addresses of scoped names; only unique within one process
+_scope_counter = itertools.count()
+
+
+def scoped_address(name: str) -> str:
+    """Fresh address for a name bound in a nested scope"""
+    return f"{name}-{next(_scope_counter)}"
+
+
 namespace_names = Literal[
     "names", "dimensions", "dimensionized", "units", "imports", "nodes", "typed"
 ]
 
 
+def _closest(name: str, candidates) -> str | None:
+    """Closest match for a misspelled name, if any is similar enough"""
+    matches = get_close_matches(name, candidates, n=1, cutoff=0.6)
+    return matches[0] if matches else None
+
+
 class Namespaces:
     def __init__(
         self,
@@ -36,6 +51,17 @@ class Namespaces:
         self.typed = typed or {}
         self.externs = externs or {}
 
+        # namespace name -> table, so lookups by name skip getattr
+        self._tables: dict[str, dict] = {
+            "names": self.names,
+            "dimensions": self.dimensions,
+            "dimensionized": self.dimensionized,
+            "units": self.units,
+            "imports": self.imports,
+            "nodes": self.nodes,
+            "typed": self.typed,
+        }
+
     def copy(self):
         return Namespaces(
             self.names.copy(),
@@ -60,17 +86,15 @@ class Namespaces:
         self.externs.update(other.externs)
 
     def __call__(self, name: namespace_names) -> dict[str, Any]:
-        return getattr(self, name)
+        return self._tables[name]
 
     def write(self, name: namespace_names, key: str, value: Any):
-        getattr(self, name)[key] = value
+        self._tables[name][key] = value
 
     def suggest(self, namespace: namespace_names, name: str):
         """Get suggestion for misspelled name"""
 
-        available_keys = getattr(self, namespace).keys()
-        matches = get_close_matches(name, available_keys, n=1, cutoff=0.6)
-        return matches[0] if matches else None
+        return _closest(name, self._tables[namespace].keys())
 
 
 class Env:
@@ -92,24 +116,45 @@ class Env:
 
         self.level = level
 
+        # copy-on-write: tables may be shared with the Env this was copied from
+        # (or with copies of this Env) until either side binds a name
+        self._shared = False
+
+        self._tables: dict[str, dict[str, str]] = {
+            "names": self.names,
+            "dimensions": self.dimensions,
+            "dimensionized": self.dimensionized,
+        }
+
     def copy(self):
-        return Env(
+        env = Env(
             self.glob,
-            self.names.copy(),
-            self.dimensions.copy(),
-            self.dimensionized.copy(),
+            self.names,
+            self.dimensions,
+            self.dimensionized,
             self.meta.copy(),
             level=self.level + 1,
         )
+        self._shared = env._shared = True
+        return env
+
+    def _unshare(self):
+        """Give this Env its own tables before the first write after a copy"""
+        self.names = self.names.copy()
+        self.dimensions = self.dimensions.copy()
+        self.dimensionized = self.dimensionized.copy()
+        self._tables = {
+            "names": self.names,
+            "dimensions": self.dimensions,
+            "dimensionized": self.dimensionized,
+        }
+        self._shared = False
 
     def suggest(self, namespace: namespace_names):
         """Get suggestion for misspelled name"""
 
-        available_keys = getattr(self, namespace).keys()
-
         def _suggest(name: str) -> str | None:
-            matches = get_close_matches(name, available_keys, n=1, cutoff=0.6)
-            return matches[0] if matches else None
+            return _closest(name, self._tables[namespace].keys())
 
         return _suggest
 
@@ -120,8 +165,11 @@ class Env:
         self, namespace: Literal["dimensions", "dimensionized"]
     ) -> Callable[[str], Expression | None]: ...
     def get(self, namespace: namespace_names) -> Callable[[str], T | Expression | None]:
+        glob = self.glob._tables[namespace]
+
         def _get(name: str) -> T | Expression | None:
-            return self.glob(namespace)[self(namespace)[name]]
+            # the Env's own table is swapped out when it is unshared
+            return glob[self._tables[namespace][name]]
 
         return _get
 
@@ -129,20 +177,23 @@ class Env:
         def _set(name: str, value: Any, address: Optional[str] = None):
             if address is None:
                 if self.level > 0:
-                    address = f"{name}-{uuid.uuid4()}"
+                    address = scoped_address(name)
                 else:
                     address = name
-            self.glob.write(namespace, address, value)
-            self(namespace)[name] = address
+            self.glob._tables[namespace][address] = value
+            if self._shared:
+                self._unshare()
+            self._tables[namespace][name] = address
             return address
 
         return _set
 
     def export(self, namespace: namespace_names) -> dict[str, Any]:
-        return {name: self.glob(namespace)[name] for name in self(namespace)}
+        glob = self.glob._tables[namespace]
+        return {name: glob[name] for name in self._tables[namespace]}
 
     def __call__(self, namespace: namespace_names) -> dict[str, str]:
-        return getattr(self, namespace)
+        return self._tables[namespace]
 
     def __repr__(self):
         return "\n".join(
@@ -3,6 +3,7 @@
 import dataclasses
 import sys
 import textwrap
+from functools import lru_cache
 from importlib import resources
 from typing import Any, Literal
 
@@ -27,6 +28,28 @@ class Mismatch:
         return False
 
 
+_DASHES = "─" * 256  # sliced for preview underlines instead of rebuilt per line
+
+
+@lru_cache(maxsize=None)
+def _console() -> rich.console.Console:
+    """Error console shared by all exceptions; resolves sys.stderr on each print"""
+    return rich.console.Console(force_terminal=True, stderr=True)
+
+
+def _escape(text: str) -> str:
+    """Escape rich markup, skipping the scan for text without '[' or backslashes"""
+    if "[" not in text and "\\" not in text:
+        return text
+    return rich.markup.escape(text)
+
+
+@lru_cache(maxsize=8)
+def _source_lines(source: str) -> tuple[str, ...]:
+    """Lines of a module's source, shared by all errors raised in it"""
+    return tuple(source.splitlines())
+
+
 class uException:
     def __init__(
         self,
@@ -37,7 +60,7 @@ class uException:
         stack: list[Location] = [],
         exit: bool = True,
     ):
-        console = rich.console.Console(force_terminal=True, stderr=True)
+        console = _console()
 
         for previous in stack:
             location = f"{module.path or '<unknown>'}" + (
@@ -63,7 +86,7 @@ class uException:
         )
 
         # Code preview
-        source_lines = module.source.splitlines()
+        source_lines = _source_lines(module.source)
         if preview and loc and module.source and 0 < loc.end_line <= len(source_lines):
             console.print()
 
@@ -82,10 +105,11 @@ class uException:
                 start = max(0, line.col - 30)
                 end = min(len(src), line.end_col + 30)
 
+                left = src[start : line.col - 1]
                 highlighted = (
-                    f"{rich.markup.escape(src[start : line.col - 1])}"
-                    f"[red bold]{rich.markup.escape(src[line.col - 1 : line.end_col])}[/red bold]"
-                    f"{rich.markup.escape(src[line.end_col : end])}"
+                    f"{_escape(left)}"
+                    f"[red bold]{_escape(src[line.col - 1 : line.end_col])}[/red bold]"
+                    f"{_escape(src[line.end_col : end])}"
                 )
                 prefix = "..." if start > 0 else ""
                 suffix = "..." if end < len(src) else ""
@@ -95,12 +119,15 @@ class uException:
                     highlight=False,
                 )
 
-                underline = "─" * (line.end_col - line.col + 1)
+                width = max(line.end_col - line.col + 1, 0)
+                underline = _DASHES[:width] if width <= len(_DASHES) else "─" * width
                 if i == 0:
                     underline = "╰" + underline[1:]
                 if i == len(locs) - 1:
                     underline = underline[:-1] + "╯"
-                marker = f"{' ' * len(f'{prefix}{src[start : line.col - 1]}')}[red bold]{underline}[/bold red]"
+                marker = (
+                    f"{' ' * (len(prefix) + len(left))}[red bold]{underline}[/bold red]"
+                )
 
                 console.print(
                     f"[dim]      |[/dim]   {marker}",
@@ -109,7 +136,7 @@ class uException:
 
         if message.help:
             console.print(
-                textwrap.indent(f"[dim]{rich.markup.escape(message.help)}[/dim]", "  "),
+                textwrap.indent(f"[dim]{_escape(message.help)}[/dim]", "  "),
                 highlight=False,
             )
 
@@ -118,14 +145,20 @@ class uException:
             sys.exit(1)
 
 
+@lru_cache(maxsize=None)
+def _messages() -> dict[str, msgparser.ErrorMessage]:
+    """Message table shared by all `Exceptions` instances (read-only)."""
+    with resources.as_file(
+        resources.files("numerobis.exceptions") / "messages.txt"
+    ) as messages_path:
+        return msgparser.parse(messages_path)
+
+
 class Exceptions:
     def __init__(self, module: ModuleMeta, stack: list[Location] = []):
         self.module = module
         self.stack = stack
-        with resources.as_file(
-            resources.files("numerobis.exceptions") / "messages.txt"
-        ) as messages_path:
-            self.codes = msgparser.parse(messages_path)
+        self.codes = _messages()
 
     def unexpectedToken(
         self, tok: Token, help: str | None = None, in_unit: bool = False
@@ -1,5 +1,8 @@
 """Lexical analysis and tokenization of source code."""
 
+import sys
+from functools import cache
+
 from ..classes import ModuleMeta
 from ..exceptions.exceptions import Exceptions
 from ..nodes.core import Location, Token
@@ -131,6 +134,9 @@ class LexTokens:
     def t_ID(self, t):
         r"(?:[^\W\d]|°)[\w°]*"
         t.type = self.reserved_map.get(t.value, "ID")
+        if t.type == "ID":
+            # names key many namespace dicts; share one string object per name
+            t.value = sys.intern(t.value)
         return t
 
     # Number literal
@@ -149,8 +155,14 @@ class LexTokens:
         raise e
 
 
+@cache
+def _master_lexer() -> plylex.Lexer:
+    """Lexer with the combined token regex, built once and cloned per source"""
+    return plylex.lex(module=LexTokens())
+
+
 def lex(source: str, module: ModuleMeta, debug=False) -> list[Token]:
-    lexer = plylex.lex(module=LexTokens())
+    lexer = _master_lexer().clone()
     errors = Exceptions(module=module)
 
     output: list[Token] = []
@@ -170,9 +182,8 @@ def lex(source: str, module: ModuleMeta, debug=False) -> list[Token]:
         if not tok:
             break
 
-        if tok.value.count("\n"):
-            npos = len(tok.value) - tok.value[::-1].find("\n")
-            last_newline_pos.append(tok.lexpos + npos)
+        if (npos := tok.value.rfind("\n")) != -1:
+            last_newline_pos.append(tok.lexpos + npos + 1)
             last_newline_pos.pop(0)
 
         token = Token(
@@ -185,7 +185,7 @@ class Module:
         cc: str = "gcc",
         linker: Optional[str] = None,
         use_cmake: bool = True,
-        use_ccache: bool = False,
+        use_ccache: Optional[bool] = None,
     ):
         if self.linker is None:
             raise ValueError("Module not linked")
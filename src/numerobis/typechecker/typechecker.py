@@ -3,7 +3,6 @@
 Performs type inference, dimensional consistency checking, and program validation.
 """
 
-import uuid
 from decimal import Decimal
 from typing import TypeVar
 
@@ -12,7 +11,7 @@ import rich
 from ..analysis.dimchecker import Dimchecker
 from ..analysis.simplifier import Simplifier
 from ..classes import ModuleMeta
-from ..environment import Env, Namespaces
+from ..environment import Env, Namespaces, scoped_address
 from ..exceptions.exceptions import Exceptions, Mismatch
 from ..nodes.ast import (
     Assertion,
@@ -58,9 +57,9 @@ from ..nodes.ast import (
     VariableDeclaration,
     WhileLoop,
 )
-from ..nodes.core import VarEnv
+from ..nodes.core import UnitNode, VarEnv
 from ..nodes.unit import AnyDim, Expression, One, Power, Product, Scalar
-from ..utils import camel2snake_pattern
+from ..utils import visitor_name
 from . import linking
 from .operators import typetable
 from .types import (
@@ -105,6 +104,9 @@ class Typechecker:
         self.dimchecker = Dimchecker(module=module, namespaces=namespaces)
         self.simplifier = Simplifier(module=module)
         self.simplify = self.simplifier.simplify
+        # resolved dimensions of number literal units, keyed by unit node identity;
+        # the node is kept alongside so its id cannot be reused while cached
+        self._unit_dims: dict[int, tuple[UnitNode, Expression | One | AnyDim]] = {}
 
         self.unresolved_funcs: list[FunctionType] = []
         self._globals: list[list[str]] = [[]]  # queue of globals of nested functions
@@ -130,7 +132,7 @@ class Typechecker:
             raise
 
         actual_name = f"{owner.name()}.{name}"
-        value = next((n for n in env.names if n == actual_name), None)
+        value = actual_name if actual_name in env.names else None
         if value is None:
             self.errors.throw(601, name=actual_name, loc=node.loc)
             raise
@@ -673,7 +675,7 @@ class Typechecker:
 
         arity = (sum(1 for p in node.params if p.default is None), len(params))
         param_names = [self.unlink(param.name).name for param in node.params]
-        param_addrs = [f"{param}-{uuid.uuid4()}" for param in param_names]
+        param_addrs = [scoped_address(param) for param in param_names]
         self.namespaces.nodes[link].meta["addrs"] = {
             name: addr for name, addr in zip(param_names, param_addrs)
         }
@@ -901,7 +903,14 @@ class Typechecker:
         return NoneType()
 
     def number_(self, node: Integer | Num, env: Env) -> NumberType:
-        dimension = self.simplify(self.dimchecker.dimensionize(node.unit, mode="unit"))
+        cached = self._unit_dims.get(id(node.unit))
+        if cached is None:
+            dimension = self.simplify(
+                self.dimchecker.dimensionize(node.unit, mode="unit")
+            )
+            self._unit_dims[id(node.unit)] = (node.unit, dimension)
+        else:
+            dimension = cached[1]
         assert isinstance(dimension, (Expression, One, AnyDim)), repr(node)
         if self._static and not isinstance(dimension, One):
             self.errors.throw(548, loc=node.loc)
@@ -1109,7 +1118,7 @@ class Typechecker:
                     params=[self.type_(param, env=env) for param in node.params],
                     param_names=[param.name for param in node.param_names],
                     param_addrs=[
-                        f"{param.name}-{uuid.uuid4()}" for param in node.param_names
+                        scoped_address(param.name) for param in node.param_names
                     ],
                     return_type=self.type_(node.return_type, env=env)
                     if node.return_type
@@ -1295,7 +1304,7 @@ class Typechecker:
                 | Call()
                 | Identifier()
             ):
-                name = camel2snake_pattern.sub("_", type(node).__name__).lower() + "_"
+                name = visitor_name(type(node))
                 ret = getattr(self, name)(
                     node,
                     env=env,
@@ -1304,9 +1313,9 @@ class Typechecker:
             case DimensionDefinition() | UnitDefinition() | FromImport() | Import():
                 return  # type: ignore
             case _:
-                name = camel2snake_pattern.sub("_", type(node).__name__).lower() + "_"
-                if hasattr(self, name):
-                    ret = getattr(self, name)(node, env=env.copy())
+                visitor = getattr(self, visitor_name(type(node)), None)
+                if visitor is not None:
+                    ret = visitor(node, env=env.copy())
                 else:
                     raise NotImplementedError(
                         f"Type {type(node).__name__} not implemented"
@@ -1,15 +1,25 @@
-import re
 import sys
+from functools import cache
 from importlib import resources
 from pathlib import Path
 from typing import Iterable
 
 STDLIB_PATH: Path = Path(next(iter(resources.files("numerobis.stdlib")._paths)))  # type: ignore
 
-camel2snake_pattern = re.compile(r"(?<!^)(?=[A-Z])")
 is_unix = "win" not in sys.platform
 
 
+@cache
+def visitor_name(cls: type) -> str:
+    """Name of the visitor method for a node type, e.g. `BinOp` -> `bin_op_`"""
+    name = cls.__name__
+    return (
+        name[0].lower()
+        + "".join("_" + c.lower() if c.isupper() else c for c in name[1:])
+        + "_"
+    )
+
+
 def isanyofinstance(objs: Iterable, *types):
     return any(isinstance(obj, types) for obj in objs)
 